@@ -0,0 +1,84 @@
+# checkpoint.py (Resumable Scan Checkpoints)
+
+import os
+import json
+import time
+import shutil
+import threading
+
+CHECKPOINT_DIR = "checkpoints"
+MAX_AGE_DAYS = 3  # Runs that were never completed are pruned after this long
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+def _lock_for(path):
+    """One lock per checkpoint file, shared by every Checkpoint instance that writes to it."""
+    with _path_locks_guard:
+        return _path_locks.setdefault(path, threading.Lock())
+
+def _to_json(value):
+    """Converts numpy scalars (e.g. the bools and floats from pandas) into plain Python values."""
+    return value.item() if hasattr(value, 'item') else str(value)
+
+class Checkpoint:
+    """
+    Persists per-ticker results for one stage of a run as they complete, in checkpoints/<run_id>/<stage>.jsonl.
+    A restarted run with the same run ID loads the finished tickers and only has to do the pending ones.
+    With run_id=None nothing is written, so callers can use it unconditionally.
+    """
+
+    def __init__(self, run_id, stage, directory=None):
+        directory = directory or CHECKPOINT_DIR
+        self.path = os.path.join(directory, run_id, f"{stage}.jsonl") if run_id else None
+        self.done = {}
+        self.lock = _lock_for(self.path) if self.path else threading.Lock()
+        if self.path and os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                content = f.read()
+            for line in content.splitlines():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A crash mid-write leaves at most one truncated last line
+                self.done[record['ticker']] = record['result']
+            if content and not content.endswith("\n"):
+                # Terminate the truncated line so the next record starts on a fresh one
+                with open(self.path, 'a') as f:
+                    f.write("\n")
+
+    def pending(self, tickers):
+        return [ticker for ticker in tickers if ticker not in self.done]
+
+    def save(self, ticker, result):
+        """Records a finished ticker. Only save results that should not be retried on resume."""
+        with self.lock:
+            self.done[ticker] = result
+            if not self.path:
+                return
+            line = json.dumps({'ticker': ticker, 'result': result}, default=_to_json) + "\n"
+            for _ in range(2):
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with open(self.path, 'a') as f:
+                        f.write(line)
+                    return
+                except FileNotFoundError:
+                    continue  # The run directory was removed between makedirs and open; recreate it
+            # Checkpoints are best-effort: the result is still kept in memory for this run
+
+def clear_run(run_id, directory=None):
+    """Deletes a run's checkpoints once it has completed, so the next run with that ID starts fresh."""
+    if run_id:
+        shutil.rmtree(os.path.join(directory or CHECKPOINT_DIR, run_id), ignore_errors=True)
+
+def prune_checkpoints(max_age_days=MAX_AGE_DAYS, directory=None):
+    """Deletes checkpoints of abandoned runs that have not been touched for `max_age_days`."""
+    directory = directory or CHECKPOINT_DIR
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age_days * 86400
+    for run_id in os.listdir(directory):
+        path = os.path.join(directory, run_id)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
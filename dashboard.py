@@ -4,9 +4,13 @@ import streamlit as st
 import os
 import glob
 import json
+import uuid
+from datetime import datetime
 from universes import NIFTY_50, NIFTY_MIDCAP_100, HIGH_LIQUIDITY_SMALLCAPS
 from moderator import run_moderator_session
 from tools import get_full_analysis
+from checkpoint import prune_checkpoints
+from symbols import negative_cache
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Swingg AI", page_icon="📈", layout="wide")
@@ -86,10 +90,17 @@ if 'validation_run' not in st.session_state:
 
 if st.button("Find Today's Opportunities", type="primary"):
     st.session_state.validation_run = True
+    # One run ID per browser session, so users never share (or clear) each other's checkpoints.
+    # If this session's scan is interrupted by a rerun, clicking again resumes it; run_moderator_session
+    # clears the checkpoints once the scan completes, so later clicks fetch fresh data. A server restart
+    # loses the ID, and the orphaned checkpoints are removed by prune_checkpoints after MAX_AGE_DAYS.
+    if 'run_id' not in st.session_state:
+        st.session_state.run_id = f"dashboard_{datetime.now():%Y-%m-%d}_{uuid.uuid4().hex[:8]}"
+    prune_checkpoints()
     with st.spinner("Agent is running... This may take several minutes."):
         combined_universe = NIFTY_50 + NIFTY_MIDCAP_100 + HIGH_LIQUIDITY_SMALLCAPS
         unique_stocks = sorted(list(set(combined_universe)))
-        st.session_state.new_reports = run_moderator_session(unique_stocks)
+        st.session_state.new_reports = run_moderator_session(unique_stocks, run_id=st.session_state.run_id)
 
 # --- Display Reports ---
 if st.session_state.validation_run:
@@ -101,14 +112,21 @@ if st.session_state.validation_run:
             with st.expander(f"{report['ticker']} ({report['name']})"):
                 targets = report['targets']
                 sma_20 = report['sma_20']
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3, col4 = st.columns(4)
                 col1.metric(label="Stop-Loss (20-day SMA)", value=f"₹{sma_20:.2f}")
                 col2.metric(label="Price Target 1", value=targets.get('target_1', 'N/A'))
                 col3.metric(label="Price Target 2", value=targets.get('target_2', 'N/A'))
+                col4.metric(label="Local Conviction Score", value=f"{report.get('local_score', 0):.1f}")
                 st.markdown("---")
                 st.markdown("### AI Debate & Analysis")
                 st.markdown(report['report'])
     else:
         st.info("No new stocks met the criteria today.")
 
+    quarantined = negative_cache.report()
+    if quarantined:
+        with st.expander(f"🚫 {len(quarantined)} Quarantined Symbol(s)"):
+            st.caption("These symbols failed to load and are skipped until their retry time.")
+            st.dataframe(quarantined, use_container_width=True)
+
 st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,279 @@
+# loadtest.py (Concurrent-Session Load Test for the Streamlit Dashboard)
+#
+# Starts one real `streamlit run dashboard.py` server (in a child process, with fake yfinance, NewsAPI and
+# Gemini providers) and connects N simulated browsers to it over Streamlit's websocket protocol. Every session
+# shares the server's modules, the quota scheduler, the negative cache and the checkpoint directory, exactly
+# as they would in production. Reports per-step latency percentiles, provider call totals and the server
+# process's memory growth.
+#
+# Quota waits in the shared scheduler are compressed by --time-scale (default 60: one real second is one
+# quota minute); pass --time-scale 1 for real-time numbers.
+#
+# Usage: python loadtest.py --sessions 20 --reruns 3 --latency 0.01
+
+import os
+import time
+import zlib
+import shutil
+import socket
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+import urllib.request
+import numpy as np
+import pandas as pd
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+PROVIDERS = ["yfinance_info", "yfinance_history", "newsapi", "gemini"]
+provider_calls = None  # multiprocessing.Array shared between the server process and this one
+PROVIDER_LATENCY = 0.0
+
+# --- FAKE PROVIDERS (installed in the server process) ---
+def count_call(provider):
+    with provider_calls.get_lock():
+        provider_calls[PROVIDERS.index(provider)] += 1
+    if PROVIDER_LATENCY:
+        time.sleep(PROVIDER_LATENCY)
+
+class FakeTicker:
+    """Deterministic stand-in for yf.Ticker: the same symbol always produces the same data."""
+
+    def __init__(self, ticker_symbol):
+        self.ticker_symbol = ticker_symbol
+        self.seed = zlib.crc32(ticker_symbol.encode())
+
+    @property
+    def info(self):
+        count_call("yfinance_info")
+        rng = np.random.default_rng(self.seed)
+        return {
+            'longName': f"{self.ticker_symbol.split('.')[0].title()} Limited",
+            'marketCap': float(rng.uniform(5e9, 300e9)),
+            'profitMargins': float(rng.uniform(-0.05, 0.30)),
+            'debtToEquity': float(rng.uniform(0, 150)),
+            'category': '',
+        }
+
+    def history(self, period="60d", **kwargs):
+        count_call("yfinance_history")
+        rng = np.random.default_rng(self.seed)
+        days = 250 if period == "1y" else 60
+        close = 100 * np.cumprod(1 + rng.normal(0.002, 0.02, days))
+        volume = rng.integers(100_000, 1_000_000, days).astype(float)
+        volume[-1] *= rng.choice([1, 4])  # Roughly half the names show a volume breakout
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+        return pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close, 'Volume': volume
+        }, index=index)
+
+class FakeNewsApiClient:
+    def __init__(self, api_key=None):
+        pass
+
+    def get_everything(self, q, **kwargs):
+        count_call("newsapi")
+        return {'articles': [{'title': f"Headline about {q}"}]}
+
+def fake_gemini(prompt_value):
+    from langchain_core.messages import AIMessage
+    count_call("gemini")
+    return AIMessage(content="Neutral. This is a canned load-test response.")
+
+class ScaledClock:
+    """Stands in for the `time` module inside scheduler.py, so quota windows pass `scale` times faster."""
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.origin = time.monotonic()
+
+    def monotonic(self):
+        return self.origin + (time.monotonic() - self.origin) * self.scale
+
+    def sleep(self, seconds):
+        time.sleep(seconds / self.scale)
+
+def serve(port, counters, latency, time_scale, state_dir):
+    """Server process: installs the fake providers, then runs the real Streamlit server on dashboard.py."""
+    global provider_calls, PROVIDER_LATENCY
+    provider_calls, PROVIDER_LATENCY = counters, latency
+    import streamlit as st
+    from streamlit.web import bootstrap
+    from langchain_core.runnables import RunnableLambda
+    import tools, symbols, checkpoint, scheduler, moderator, specialist_agents
+
+    tools.yf.Ticker = FakeTicker
+    tools.NewsApiClient = FakeNewsApiClient
+    st.secrets = {"NEWS_API_KEY": "load-test", "GEMINI_API_KEY": "load-test"}
+    os.environ['GOOGLE_API_KEY'] = 'load-test'
+    fake_llm = RunnableLambda(fake_gemini)
+    specialist_agents.get_llm = lambda *args, **kwargs: fake_llm
+    moderator.get_llm = lambda *args, **kwargs: fake_llm
+    # Keep the real shared scheduler and quota; only its clock is compressed.
+    scheduler.time = ScaledClock(time_scale)
+
+    # Shared by every session like in production, but never the real checkpoints/ or negative_cache.json
+    checkpoint.CHECKPOINT_DIR = os.path.join(state_dir, "checkpoints")
+    symbols.negative_cache = tools.negative_cache = symbols.NegativeCache(os.path.join(state_dir, "negative_cache.json"))
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # dashboard.py globs watchlist_*.json from the CWD
+    flag_options = {
+        "server_port": port,
+        "server_headless": True,
+        "server_fileWatcherType": "none",
+        "browser_gatherUsageStats": False,
+    }
+    bootstrap.run("dashboard.py", False, [], flag_options)
+
+# --- SIMULATED BROWSER ---
+class Session:
+    """One simulated browser tab talking to the server over /_stcore/stream."""
+
+    def __init__(self, url, timeout):
+        self.url = url
+        self.timeout = timeout
+        self.button_id = None
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.url, max_message_size=64 * 1024 * 1024)
+
+    async def rerun(self, widget_states=()):
+        """Sends a rerun (what the browser does on load and on any widget interaction) and waits for it to finish."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        while True:
+            data = await asyncio.wait_for(self.ws.read_message(), self.timeout)
+            if data is None:
+                raise RuntimeError("Server closed the connection")
+            forward = ForwardMsg()
+            forward.ParseFromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                if element.WhichOneof("type") == "button":
+                    self.button_id = element.button.id
+                elif element.WhichOneof("type") == "exception":
+                    raise RuntimeError(element.exception.message)
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    return time.perf_counter() - start
+                if forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    raise RuntimeError(f"Script finished with status {forward.script_finished}")
+
+    async def click_button(self):
+        return await self.rerun([WidgetState(id=self.button_id, trigger_value=True)])
+
+    def close(self):
+        self.ws.close()
+
+async def run_session(url, reruns, timeout):
+    """Runs one user's journey and returns the latency (seconds) of each step."""
+    session = Session(url, timeout)
+    await session.connect()
+    try:
+        timings = {'initial_load': await session.rerun()}
+        timings['scan'] = await session.click_button()
+        # Opening or closing an expander is handled entirely in the browser and sends nothing to the
+        # server, so there is nothing to simulate. Any other widget interaction reruns the whole script,
+        # including display_validation_report, which is what these reruns measure.
+        timings['rerun'] = [await session.rerun() for _ in range(reruns)]
+        return timings
+    finally:
+        session.close()
+
+async def run_sessions(url, sessions, reruns, timeout):
+    return await asyncio.gather(*[run_session(url, reruns, timeout) for _ in range(sessions)], return_exceptions=True)
+
+# --- REPORTING ---
+def percentile(values, pct):
+    return float(np.percentile(values, pct)) if values else 0.0
+
+def process_memory_mb(pid):
+    """Returns (current RSS, peak RSS) in MB for a process, read from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            fields = dict(line.split(':', 1) for line in f)
+        return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+def wait_for_server(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"Streamlit server did not start within {timeout}s")
+
+def print_report(results, errors, elapsed, memory_before, memory_after):
+    print("\n--- Load Test Report ---")
+    print(f"Sessions Completed:   {len(results)} ({len(errors)} failed) in {elapsed:.1f}s")
+    print("---------------------------------")
+    print(f"{'Step':<14}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}")
+    steps = {
+        'initial_load': [r['initial_load'] for r in results],
+        'scan': [r['scan'] for r in results],
+        'rerun': [t for r in results for t in r['rerun']],
+    }
+    for step, values in steps.items():
+        print(f"{step:<14}" + "".join(f"{percentile(values, p):>7.2f}s" for p in (50, 95, 99, 100)))
+    print("---------------------------------")
+    for index, provider in enumerate(PROVIDERS):
+        calls = provider_calls[index]
+        per_session = calls / len(results) if results else 0
+        print(f"{provider + ' calls:':<22}{calls:>8} ({per_session:.1f} per session)")
+    print("---------------------------------")
+    (rss_before, _), (rss_after, peak) = memory_before, memory_after
+    if rss_before is None or rss_after is None:
+        print("Server RSS:           n/a (needs /proc)")
+    else:
+        print(f"Server RSS:           {rss_before:.1f} MB -> {rss_after:.1f} MB (+{rss_after - rss_before:.1f} MB, peak {peak:.1f} MB)")
+    for error in errors[:5]:
+        print(f"  - ❌ {error}")
+
+# --- MAIN LOAD TEST EXECUTION ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for dashboard.py")
+    parser.add_argument("--sessions", type=int, default=20, help="Number of simultaneous users")
+    parser.add_argument("--reruns", type=int, default=3, help="Reruns (widget interactions) per session after the scan")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency per provider call, in seconds")
+    parser.add_argument("--time-scale", type=float, default=60, help="How much faster quota windows pass in the scheduler")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-step timeout, in seconds")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    provider_calls = context.Array('q', len(PROVIDERS))
+    state_dir = tempfile.mkdtemp(prefix="swingg_loadtest_")
+    port = free_port()
+    server = context.Process(target=serve, args=(port, provider_calls, args.latency, args.time_scale, state_dir), daemon=True)
+    server.start()
+    try:
+        wait_for_server(port, timeout=60)
+        print(f"Starting {args.sessions} concurrent dashboard session(s) against one server (pid {server.pid})...")
+        memory_before = process_memory_mb(server.pid)
+        start = time.perf_counter()
+        outcomes = asyncio.run(run_sessions(f"ws://localhost:{port}/_stcore/stream", args.sessions, args.reruns, args.timeout))
+        elapsed = time.perf_counter() - start
+        memory_after = process_memory_mb(server.pid)
+    finally:
+        server.terminate()
+        server.join()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    results = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+    errors = [f"{type(outcome).__name__}: {outcome}" for outcome in outcomes if isinstance(outcome, BaseException)]
+    print_report(results, errors, elapsed, memory_before, memory_after)
@@ -3,19 +3,22 @@
 import os
 import json
 import glob
-from tools import get_watchlist_candidates, get_full_analysis, get_news_headlines, calculate_price_targets
+from tools import get_watchlist_candidates, analyse_universe, get_news_headlines, calculate_price_targets, calculate_conviction_scores
 from specialist_agents import create_technical_agent, create_fundamental_agent, create_sentiment_agent
-from langchain_google_genai import ChatGoogleGenerativeAI
+from scheduler import get_llm, ScheduledChain, QuotaExhausted
+from checkpoint import Checkpoint, clear_run
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
 # The API key is now handled by the main app (dashboard.py), so we don't need to import config or set the environment variable here.
 
+TOP_K_DEBATES = 5  # Maximum number of candidates sent to the (paid) LLM debate per session
+
 def create_moderator_agent():
     """
     This function is a wrapper that returns a function to run the full two-step debate.
     """
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.7)
+    llm = get_llm()
 
     cross_examination_prompt = PromptTemplate.from_template(
         """
@@ -43,6 +46,11 @@ def create_moderator_agent():
 
         **Key Point of Debate (The Critical Question):** {critical_question}
 
+        **Pre-Debate Quantitative Scores (computed locally from the screening data):**
+        - Technical: {technical_score}/100
+        - Fundamental: {fundamental_score}/100
+        - Local Conviction Score (Sentiment held at a neutral 50): {local_score}/100
+
         **Your Task:**
         Generate a concise "Final Analysis Transcript" that explicitly incorporates the debate. Follow this structure:
 
@@ -57,15 +65,15 @@ def create_moderator_agent():
         [Start with "The key point of debate was clear:" and then state the critical question. Follow with a 1-2 sentence synthesis of how the team weighed this conflict.]
 
         **3. Conviction Score Calculation:**
-        [Explicitly show the math for the conviction score. Assign a score out of 100 for each category before calculating the weighted total (60% Tech, 30% Fund, 10% Sent).]
+        [Explicitly show the math for the conviction score. Use the pre-debate Technical and Fundamental scores as given, assign a Sentiment score out of 100 based on the Sentiment View, then calculate the weighted total (60% Tech, 30% Fund, 10% Sent).]
         
         **4. Final Recommendation:**
         [Provide a final, one-sentence recommendation.]
         """
     )
     
-    question_chain = cross_examination_prompt | llm | StrOutputParser()
-    report_chain = final_report_prompt | llm | StrOutputParser()
+    question_chain = ScheduledChain(cross_examination_prompt | llm | StrOutputParser())
+    report_chain = ScheduledChain(final_report_prompt | llm | StrOutputParser())
 
     def run_full_process(data):
         critical_question = question_chain.invoke(data)
@@ -75,12 +83,32 @@ def create_moderator_agent():
         
     return run_full_process
 
-def run_moderator_session(stock_universe):
-    """Finds candidates and runs the full agentic analysis, returning a list of reports."""
+def prioritise_candidates(watchlist, top_k=TOP_K_DEBATES, run_id=None):
+    """
+    Fetches analysis for each candidate, attaches its local conviction scores and returns the top K:
+    volume-breakout action signals first, then plain watchlist names, each group by local conviction score.
+    """
+    analyses = analyse_universe(watchlist, run_id, desc="Scoring Candidates").values()
+    # Aliased symbols (e.g. ZOMATO.NS and ETERNAL.NS) resolve to the same ticker; keep one of each
+    analyses = {analysis['ticker']: dict(analysis) for analysis in analyses if analysis}
+    scores = calculate_conviction_scores(list(analyses.values()))
+    # scores is already sorted by local score, and sorted() is stable, so this keeps that order within each group
+    ranked = sorted(scores.index, key=lambda ticker: not analyses[ticker]['passes_volume'])
+    return [{**analyses[ticker], **scores.loc[ticker].to_dict()} for ticker in ranked[:top_k]]
+
+def run_moderator_session(stock_universe, top_k=TOP_K_DEBATES, run_id=None):
+    """
+    Finds candidates and runs the full agentic analysis on the top K, returning a list of reports.
+    If the Gemini budget runs out mid-session, the reports finished so far are returned.
+    With a run_id, analyses and debate reports are checkpointed, so calling again with the same run_id
+    skips finished work and only resumes what is pending. The checkpoints are cleared once every candidate
+    has been debated, so the next call with that run_id starts fresh.
+    """
     print(f"Moderator session started for {len(stock_universe)} stocks...")
     
-    watchlist = get_watchlist_candidates(stock_universe)
+    watchlist = get_watchlist_candidates(stock_universe, run_id)
     final_reports = []
+    complete = True
 
     if not watchlist:
         print("Moderator concludes: No interesting candidates found today.")
@@ -92,34 +120,58 @@ def run_moderator_session(stock_universe):
         sentiment_agent = create_sentiment_agent()
         moderator_process = create_moderator_agent()
         
-        for ticker in watchlist:
-            analysis_data = get_full_analysis(ticker)
-            if not analysis_data: continue
-            
-            tech_report = technical_agent.invoke(analysis_data)
-            fund_report = fundamental_agent.invoke(analysis_data)
-            headlines = get_news_headlines(ticker)
-            sent_report = sentiment_agent.invoke({"ticker": ticker, "headlines": headlines})
-            
-            moderator_input = {
-                "ticker": ticker,
-                "name": analysis_data.get('name', ''),
-                "technical_report": tech_report,
-                "fundamental_report": fund_report,
-                "sentiment_report": sent_report
-            }
+        candidates = prioritise_candidates(watchlist, top_k, run_id)
+        print(f"Debating the top {len(candidates)} (action signals first, then by local conviction score): {[c['ticker'] for c in candidates]}")
+        debates = Checkpoint(run_id, "debates")
+        
+        for analysis_data in candidates:
+            ticker = analysis_data['ticker']
+            if ticker in debates.done:
+                final_reports.append(debates.done[ticker])
+                continue
             
-            report_text = moderator_process(moderator_input)
+            try:
+                tech_report = technical_agent.invoke(analysis_data)
+                fund_report = fundamental_agent.invoke(analysis_data)
+                headlines = get_news_headlines(ticker)
+                sent_report = sentiment_agent.invoke({"ticker": ticker, "headlines": headlines})
+                
+                moderator_input = {
+                    "ticker": ticker,
+                    "name": analysis_data.get('name', ''),
+                    "technical_report": tech_report,
+                    "fundamental_report": fund_report,
+                    "sentiment_report": sent_report,
+                    "technical_score": analysis_data['technical_score'],
+                    "fundamental_score": analysis_data['fundamental_score'],
+                    "local_score": analysis_data['local_score']
+                }
+                
+                report_text = moderator_process(moderator_input)
+            except QuotaExhausted as e:
+                print(f"Moderator stopping early with {len(final_reports)} report(s): {e}")
+                complete = False
+                break
+            except Exception as e:
+                # Any other failure (e.g. Gemini still returning 5xx after retries) only costs this candidate
+                print(f"Moderator skipping {ticker}: {e}")
+                complete = False
+                continue
             
             targets = calculate_price_targets(ticker)
             sma_20 = analysis_data.get('sma_20_value', 0)
             
-            final_reports.append({
+            report = {
                 "ticker": ticker,
                 "name": analysis_data.get('name', ''),
                 "report": report_text,
                 "targets": targets,
-                "sma_20": sma_20
-            })
-            
+                "sma_20": sma_20,
+                "local_score": analysis_data['local_score']
+            }
+            debates.save(ticker, report)
+            final_reports.append(report)
+    
+    if complete:
+        clear_run(run_id)
     return final_reports
\ No newline at end of file
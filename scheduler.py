@@ -0,0 +1,202 @@
+# scheduler.py (Quota-Aware Gemini Scheduler)
+
+import os
+import re
+import time
+import threading
+from functools import lru_cache
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+try:
+    from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable, InternalServerError, DeadlineExceeded
+    QUOTA_ERRORS = (ResourceExhausted,)
+    TRANSIENT_ERRORS = (ServiceUnavailable, InternalServerError, DeadlineExceeded, TimeoutError, ConnectionError)
+except ImportError:  # Newer langchain-google-genai releases raise google.genai errors with an HTTP `.code` instead
+    QUOTA_ERRORS = ()
+    TRANSIENT_ERRORS = (TimeoutError, ConnectionError)
+
+# --- QUOTA SETTINGS ---
+# Defaults match the Gemini 1.5 Flash free tier. Override with environment variables on paid plans.
+DEFAULT_MODEL = "gemini-1.5-flash"
+GEMINI_RPM = int(os.environ.get("GEMINI_RPM", 15))
+GEMINI_TPM = int(os.environ.get("GEMINI_TPM", 1_000_000))
+MAX_WAIT_SECONDS = float(os.environ.get("GEMINI_MAX_WAIT_SECONDS", 120))
+MAX_RETRIES = 5
+BASE_BACKOFF_SECONDS = 5   # Doubles per attempt: 5, 10, 20, 40, 60s covers a full per-minute window
+MAX_BACKOFF_SECONDS = 60
+OUTPUT_TOKEN_ALLOWANCE = 400  # Rough size of a specialist/moderator answer
+CHARS_PER_TOKEN = 4
+
+
+class QuotaExhausted(Exception):
+    """Raised when the request budget cannot be met within MAX_WAIT_SECONDS."""
+
+
+class TokenBucket:
+    """A thread-safe token bucket that refills continuously up to its capacity."""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        """Returns how many seconds until `amount` tokens are available (0 if available now)."""
+        with self.lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                return 0.0
+            return (amount - self.tokens) / self.refill_per_second
+
+    def take(self, amount):
+        """Takes `amount` tokens if available and returns True, otherwise returns False."""
+        with self.lock:
+            self._refill()
+            amount = min(amount, self.capacity)
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return True
+            return False
+
+    def refund(self, amount):
+        """Returns unused tokens to the bucket."""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self, seconds=0):
+        """Empties the bucket and holds it empty for `seconds`, pausing every caller until it refills."""
+        with self.lock:
+            self.tokens = -seconds * self.refill_per_second
+            self.updated_at = time.monotonic()
+
+
+@lru_cache(maxsize=None)
+def get_llm(model=DEFAULT_MODEL, temperature=0.7):
+    """Returns one pooled client per (model, temperature). Retries are left to the scheduler."""
+    return ChatGoogleGenerativeAI(model=model, temperature=temperature, max_retries=0)
+
+
+def _error_chain(error):
+    """Yields the error and whatever it wraps: langchain re-raises Google API errors with `raise ... from`."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status_code(error):
+    code = getattr(error, 'code', None)
+    if callable(code):  # gRPC errors expose code() instead of an attribute
+        return None
+    return code if isinstance(code, int) else None
+
+
+def _is_quota_error(error):
+    return any(isinstance(e, QUOTA_ERRORS) or _status_code(e) == 429 for e in _error_chain(error))
+
+
+def _is_transient_error(error):
+    """Server-side hiccups (5xx, timeouts) that are worth retrying without touching the quota."""
+    return any(isinstance(e, TRANSIENT_ERRORS) or _status_code(e) in (500, 502, 503, 504) for e in _error_chain(error))
+
+
+def _server_retry_delay(error):
+    """Extracts the retry delay Gemini suggests in a 429, e.g. `retry_delay { seconds: 37 }` or `"retryDelay": "37s"`."""
+    match = re.search(r'retry_?delay\W*(?:seconds\W*)?(\d+)', str(error), re.IGNORECASE)
+    return int(match.group(1)) if match else 0
+
+
+def _backoff(attempt):
+    return min(BASE_BACKOFF_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS)
+
+
+class LLMScheduler:
+    """Routes every chain invocation through shared RPM and TPM token buckets."""
+
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM, max_wait=MAX_WAIT_SECONDS):
+        self.requests = TokenBucket(rpm, rpm / 60.0)
+        self.tokens = TokenBucket(tpm, tpm / 60.0)
+        self.max_wait = max_wait
+
+    def estimate_tokens(self, chain, data):
+        """Estimates prompt + completion tokens by rendering the chain's prompt when possible."""
+        try:
+            prompt_text = chain.first.format(**data)
+        except Exception:
+            prompt_text = str(data)
+        return len(prompt_text) // CHARS_PER_TOKEN + OUTPUT_TOKEN_ALLOWANCE
+
+    def acquire(self, token_estimate):
+        """Blocks until both budgets allow the call, or raises QuotaExhausted."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(token_estimate))
+            if wait == 0 and self.requests.take(1):
+                if self.tokens.take(token_estimate):
+                    return
+                # Another caller beat us to the token budget; hand the request slot back.
+                self.requests.refund(1)
+                continue
+            if time.monotonic() + wait > deadline:
+                raise QuotaExhausted(f"Gemini budget exhausted (next slot in {wait:.0f}s).")
+            time.sleep(min(wait, 1.0) if wait else 0.05)
+
+    def invoke(self, chain, data):
+        """
+        Invokes a LangChain runnable within the quota. 429s pause every caller (exponential backoff, or the
+        server's retry delay if longer); 5xx errors and timeouts back off this caller only.
+        """
+        token_estimate = self.estimate_tokens(chain, data)
+        for attempt in range(MAX_RETRIES + 1):
+            self.acquire(token_estimate)
+            try:
+                return chain.invoke(data)
+            except Exception as e:
+                quota_error = _is_quota_error(e)
+                if not quota_error and not _is_transient_error(e):
+                    raise
+                if attempt == MAX_RETRIES:
+                    if quota_error:
+                        raise QuotaExhausted(f"Gemini kept rejecting requests: {e}") from e
+                    raise
+                delay = _backoff(attempt)
+                if quota_error:
+                    # The server disagrees with our accounting: pause everyone, not just this caller.
+                    delay = max(delay, _server_retry_delay(e))
+                    self.requests.drain(delay)
+                    self.tokens.drain(delay)
+                else:
+                    time.sleep(delay)
+
+
+class ScheduledChain:
+    """Wraps a chain so that `.invoke()` goes through the shared scheduler."""
+
+    def __init__(self, chain, scheduler=None):
+        self.chain = chain
+        self.scheduler = scheduler
+
+    def invoke(self, data):
+        return (self.scheduler or get_scheduler()).invoke(self.chain, data)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Returns the process-wide scheduler shared by every chain and Streamlit session."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
@@ -1,14 +1,15 @@
 # screener.py (with Exact Stop-Loss Price)
 
 import yfinance as yf
-from tqdm import tqdm
 import warnings
 import json
 from datetime import datetime
 import os
 import glob
 from universes import NIFTY_50, NIFTY_MIDCAP_100, HIGH_LIQUIDITY_SMALLCAPS
-from tools import get_full_analysis, calculate_price_targets
+from tools import get_full_analysis, calculate_price_targets, analyse_universe
+from symbols import negative_cache
+from checkpoint import clear_run, prune_checkpoints
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
@@ -36,19 +37,17 @@ def validate_previous_watchlist(previous_watchlist_data):
             status, details = "❌ Signal Weakened", "Trend or momentum has broken down."
         print(f"  - {ticker} ({stock['name']}): {status} -> {details}")
 
-def screen_stocks(stock_universe):
+def screen_stocks(stock_universe, run_id=None):
+    """With a run_id, per-ticker results are checkpointed so a restarted scan resumes where it stopped."""
     action_signals, watchlist_candidates = [], []
-    for ticker_symbol in tqdm(stock_universe, desc="Screening For New Signals"):
-        try:
-            analysis = get_full_analysis(ticker_symbol)
-            if not analysis: continue
-            if analysis['passes_mc'] and analysis['passes_pm'] and analysis['passes_de'] and \
-               analysis['passes_sma'] and analysis['passes_rsi']:
-                watchlist_candidates.append(analysis) # Return the full analysis dict
-                if analysis['passes_volume']:
-                    action_signals.append(analysis)
-        except Exception:
-            continue
+    analyses = analyse_universe(stock_universe, run_id, desc="Screening For New Signals")
+    for analysis in analyses.values():
+        if not analysis: continue
+        if analysis['passes_mc'] and analysis['passes_pm'] and analysis['passes_de'] and \
+           analysis['passes_sma'] and analysis['passes_rsi']:
+            watchlist_candidates.append(analysis) # Return the full analysis dict
+            if analysis['passes_volume']:
+                action_signals.append(analysis)
     return action_signals, watchlist_candidates
 
 def print_stock_report(stock_analysis):
@@ -84,8 +83,13 @@ if __name__ == "__main__":
     combined_universe = NIFTY_50 + NIFTY_MIDCAP_100 + HIGH_LIQUIDITY_SMALLCAPS
     unique_stocks = sorted(list(set(combined_universe)))
 
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    run_id = f"screener_{today_str}"
+    prune_checkpoints()
     print(f"Running screener on a combined universe of {len(unique_stocks)} stocks...")
-    action_signals, watchlist_candidates = screen_stocks(unique_stocks)
+    # If an earlier run today crashed, resume from checkpoints/screener_<date>/ instead of starting over.
+    # The checkpoints are cleared once the results are saved, so a later run today fetches fresh data.
+    action_signals, watchlist_candidates = screen_stocks(unique_stocks, run_id=run_id)
 
     print("\n--- Screening Complete: Final Report ---")
 
@@ -113,11 +117,16 @@ if __name__ == "__main__":
         print(f"\n➖ Found {len(dropped_signals)} Dropped Signal(s) (No Longer Qualify):")
         for stock in dropped_signals: print(f"  - {stock['ticker']} ({stock['name']})")
 
-    today_str = datetime.now().strftime("%Y-%m-%d")
+    quarantined = negative_cache.report()
+    if quarantined:
+        print(f"\n🚫 {len(quarantined)} Quarantined Symbol(s) (skipped until their retry time):")
+        for entry in quarantined: print(f"  - {entry['ticker']}: {entry['reason']} (failures: {entry['failures']}, retry after {entry['retry_after']})")
+
     filename = f"watchlist_{today_str}.json"
     # We need to save a simplified version to JSON, not the full complex object
     watchlist_to_save = [{'ticker': s['ticker'], 'name': s['name']} for s in watchlist_candidates if s['ticker'] not in {a['ticker'] for a in action_signals}]
     actions_to_save = [{'ticker': s['ticker'], 'name': s['name']} for s in action_signals]
     with open(filename, 'w') as f:
         json.dump({"action_signals": actions_to_save, "watchlist_candidates": watchlist_to_save}, f, indent=4)
-    print(f"\n💾 Today's results saved to {filename}")
\ No newline at end of file
+    print(f"\n💾 Today's results saved to {filename}")
+    clear_run(run_id)
\ No newline at end of file
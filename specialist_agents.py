@@ -1,7 +1,7 @@
 # specialist_agents.py (Final Corrected and Secure Version)
 
 import streamlit as st
-from langchain_google_genai import ChatGoogleGenerativeAI
+from scheduler import get_llm, ScheduledChain
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
@@ -9,7 +9,7 @@ from langchain_core.output_parsers import StrOutputParser
 
 def create_technical_agent():
     """Creates a LangChain-powered Technical Agent using LCEL."""
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.7)
+    llm = get_llm()
     
     prompt = PromptTemplate.from_template(
         """
@@ -27,11 +27,11 @@ def create_technical_agent():
         """
     )
     
-    return prompt | llm | StrOutputParser()
+    return ScheduledChain(prompt | llm | StrOutputParser())
 
 def create_fundamental_agent():
     """Creates a LangChain-powered Fundamental Agent using LCEL."""
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.7)
+    llm = get_llm()
     
     prompt = PromptTemplate.from_template(
         """
@@ -53,11 +53,11 @@ def create_fundamental_agent():
         """
     )
     
-    return prompt | llm | StrOutputParser()
+    return ScheduledChain(prompt | llm | StrOutputParser())
 
 def create_sentiment_agent():
     """Creates a LangChain-powered Sentiment Agent using LCEL."""
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.7)
+    llm = get_llm()
     
     prompt = PromptTemplate.from_template(
         """
@@ -73,4 +73,4 @@ def create_sentiment_agent():
         """
     )
 
-    return prompt | llm | StrOutputParser()
\ No newline at end of file
+    return ScheduledChain(prompt | llm | StrOutputParser())
\ No newline at end of file
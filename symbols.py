@@ -0,0 +1,80 @@
+# symbols.py (Symbol Aliases & Negative Cache for Dead Tickers)
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+from universes import SYMBOL_ALIASES
+
+NEGATIVE_CACHE_FILE = "negative_cache.json"
+BASE_TTL_HOURS = 6       # First failure: skip the symbol for 6 hours
+MAX_TTL_HOURS = 24 * 30  # Doubles on every further failure, capped at 30 days
+
+def resolve_symbol(ticker_symbol):
+    """Redirects renamed or demerged symbols to their current listing."""
+    return SYMBOL_ALIASES.get(ticker_symbol, ticker_symbol)
+
+def _retry_after(entry):
+    """Returns an entry's retry time, or None if the entry is missing or malformed."""
+    try:
+        int(entry['failures'])
+        return datetime.fromisoformat(entry['retry_after'])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+class NegativeCache:
+    """
+    Remembers symbols that failed to resolve, so they cost nothing until their backoff expires.
+    Entries are persisted to NEGATIVE_CACHE_FILE and survive between runs.
+    """
+
+    def __init__(self, path=NEGATIVE_CACHE_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    entries = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                entries = {}
+            # Drop anything malformed (e.g. hand-edited) rather than letting it break a scan later
+            if isinstance(entries, dict):
+                self.entries = {ticker: entry for ticker, entry in entries.items() if _retry_after(entry)}
+
+    def _save(self):
+        """Writes to a temporary file and swaps it in, so a crash mid-write never leaves invalid JSON."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.entries, f, indent=4)
+        os.replace(temp_path, self.path)
+
+    def is_quarantined(self, ticker_symbol):
+        retry_after = _retry_after(self.entries.get(ticker_symbol))
+        return retry_after is not None and datetime.now() < retry_after
+
+    def record_failure(self, ticker_symbol, reason):
+        """Quarantines a symbol, doubling its time-to-live with every consecutive failure."""
+        with self.lock:
+            failures = self.entries.get(ticker_symbol, {}).get('failures', 0) + 1
+            ttl_hours = min(BASE_TTL_HOURS * 2 ** (failures - 1), MAX_TTL_HOURS)
+            self.entries[ticker_symbol] = {
+                'failures': failures,
+                'retry_after': (datetime.now() + timedelta(hours=ttl_hours)).isoformat(timespec='seconds'),
+                'reason': reason,
+            }
+            self._save()
+
+    def record_success(self, ticker_symbol):
+        with self.lock:
+            if self.entries.pop(ticker_symbol, None) is not None:
+                self._save()
+
+    def report(self):
+        """Returns the currently quarantined symbols, most-failed first."""
+        with self.lock:
+            entries = list(self.entries.items())
+        quarantined = [{'ticker': ticker, **entry} for ticker, entry in entries if self.is_quarantined(ticker)]
+        return sorted(quarantined, key=lambda entry: -entry['failures'])
+
+negative_cache = NegativeCache()
@@ -1,23 +1,54 @@
 # tools.py (Complete Version with Test Block)
 
 import yfinance as yf
+import pandas as pd
 from ta.momentum import RSIIndicator
 from newsapi import NewsApiClient
 from tqdm import tqdm
 import warnings
 import streamlit as st
+from checkpoint import Checkpoint
+from symbols import resolve_symbol, negative_cache
+
+try:
+    from yfinance.exceptions import YFTickerMissingError, YFPricesMissingError
+    DEAD_SYMBOL_ERRORS = (YFTickerMissingError, YFPricesMissingError)
+except ImportError:  # Older yfinance releases without typed exceptions
+    DEAD_SYMBOL_ERRORS = ()
 
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 
 # --- AGENT TOOLBOX ---
 
+def _is_dead_symbol_error(error):
+    """True only for errors that mean the symbol does not exist, not for rate limits or network trouble."""
+    status_code = getattr(getattr(error, 'response', None), 'status_code', None)
+    return isinstance(error, DEAD_SYMBOL_ERRORS) or status_code == 404
+
 def get_full_analysis(ticker_symbol):
-    """Performs a full analysis on a single stock and returns a structured dictionary."""
+    """
+    Performs a full analysis on a single stock and returns a structured dictionary.
+    Renamed symbols are redirected via SYMBOL_ALIASES. Symbols that are definitely dead (no price history,
+    missing ticker, 404) are quarantined and skipped without any network calls until their backoff expires.
+    Transient failures just return None and are tried again next time.
+    """
+    ticker_symbol = resolve_symbol(ticker_symbol)
+    if negative_cache.is_quarantined(ticker_symbol): return None
     try:
         stock = yf.Ticker(ticker_symbol)
+        # History first: a dead symbol comes back empty here, and we skip the slower .info call
+        hist_data = stock.history(period="60d", raise_errors=True)
+    except Exception as e:
+        if _is_dead_symbol_error(e):
+            negative_cache.record_failure(ticker_symbol, f"{type(e).__name__}: {e}")
+        return None
+    if hist_data.empty:
+        negative_cache.record_failure(ticker_symbol, "No price history (possibly delisted or renamed)")
+        return None
+    negative_cache.record_success(ticker_symbol)
+
+    try:
         info = stock.info
-        hist_data = stock.history(period="60d")
-        if hist_data.empty: return None
 
         # ... [other calculations remain the same] ...
         market_cap = info.get('marketCap', 0)
@@ -40,6 +71,10 @@ def get_full_analysis(ticker_symbol):
             'market_cap': market_cap,
             'profit_margin': profit_margin,
             'sma_20_value': sma_20, # <-- ADD THIS LINE
+            'sma_5_value': sma_5,
+            'rsi_value': rsi,
+            'volume_ratio': current_volume / avg_volume_15d if avg_volume_15d else 0,
+            'debt_to_equity': debt_to_equity,
             'passes_mc': 10e9 <= market_cap <= 200e9,
             'passes_pm': profit_margin is not None and profit_margin > 0.05,
             'passes_de': ('financial' in category or 'bank' in category) or (debt_to_equity is not None and debt_to_equity < 100),
@@ -51,16 +86,59 @@ def get_full_analysis(ticker_symbol):
     except Exception:
         return None
 
-def get_watchlist_candidates(stock_universe):
+def analyse_universe(stock_universe, run_id=None, desc="Analysing Stocks"):
+    """
+    Runs get_full_analysis on every ticker and returns {ticker: analysis or None}.
+    With a run_id, each result is checkpointed as it completes and tickers finished by an earlier attempt are skipped.
+    Only successful analyses and quarantined (dead) symbols are checkpointed; transient failures stay pending.
+    """
+    checkpoint = Checkpoint(run_id, "analysis")
+    results = dict(checkpoint.done)
+    for ticker in tqdm(checkpoint.pending(stock_universe), desc=desc):
+        results[ticker] = get_full_analysis(ticker)
+        if results[ticker] or negative_cache.is_quarantined(resolve_symbol(ticker)):
+            checkpoint.save(ticker, results[ticker])
+    return {ticker: results[ticker] for ticker in stock_universe}
+
+def get_watchlist_candidates(stock_universe, run_id=None):
     """Runs the initial filters to find stocks that are poised for a move."""
     watchlist = []
-    for ticker in tqdm(stock_universe, desc="Finding Watchlist Candidates"):
-        analysis = get_full_analysis(ticker)
+    analyses = analyse_universe(stock_universe, run_id, desc="Finding Watchlist Candidates")
+    for ticker, analysis in analyses.items():
         if analysis and analysis['passes_mc'] and analysis['passes_pm'] and \
            analysis['passes_de'] and analysis['passes_sma'] and analysis['passes_rsi']:
             watchlist.append(ticker)
     return watchlist
 
+def calculate_conviction_scores(analyses):
+    """
+    Scores candidates locally with the 60/30/10 conviction weighting, before any LLM is called.
+    Technical = SMA spread, RSI headroom below 70 and volume ratio. Fundamental = Profit Margin and D/E.
+    Sentiment is unknown until the debate, so it is held at a neutral 50.
+    Returns a DataFrame indexed by ticker, sorted from strongest to weakest (volume ratio breaks ties).
+    """
+    columns = ['technical_score', 'fundamental_score', 'sentiment_score', 'local_score']
+    if not analyses:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.DataFrame(analyses).set_index('ticker')
+    sma_spread = (df['sma_5_value'] - df['sma_20_value']) / df['sma_20_value']
+    sma_score = (sma_spread / 0.05).clip(0, 1) * 100           # 5% spread above the 20-day SMA scores full marks
+    rsi_score = ((70 - df['rsi_value']) / 30).clip(0, 1) * 100  # RSI 40 or lower scores full marks
+    volume_score = (df['volume_ratio'] / 3).clip(0, 1) * 100    # 3x average volume (the breakout rule) scores full marks
+    df['technical_score'] = ((sma_score + rsi_score + volume_score) / 3).fillna(0)
+
+    margin_score = (df['profit_margin'].astype(float) / 0.20).clip(0, 1) * 100  # 20% margin scores full marks
+    de_score = (1 - df['debt_to_equity'].astype(float) / 100).clip(0, 1) * 100  # yfinance D/E is in percent
+    # Banks and financials have no meaningful D/E; they pass the filter, so they score full marks here too.
+    de_score = de_score.fillna(df['passes_de'].astype(float) * 100)
+    df['fundamental_score'] = ((margin_score.fillna(0) + de_score) / 2)
+
+    df['sentiment_score'] = 50.0
+    df['local_score'] = 0.6 * df['technical_score'] + 0.3 * df['fundamental_score'] + 0.1 * df['sentiment_score']
+    df[columns] = df[columns].round(1)
+    return df.sort_values(['local_score', 'volume_ratio'], ascending=False)[columns]
+
 def get_news_headlines(ticker_symbol):
     """Fetches recent news headlines for a given stock ticker using the 'everything' endpoint."""
     try:
@@ -24,4 +24,10 @@ NIFTY_MIDCAP_100 = [
 HIGH_LIQUIDITY_SMALLCAPS = [ # A sample of highly traded small-cap stocks
     "BSE.NS", "CDSL.NS", "IRCON.NS", "RVNL.NS", "HUDCO.NS", "IRFC.NS", "NBCC.NS", "NATIONALUM.NS", "SUZLON.NS", "IDFCFIRSTB.NS",
     "RPOWER.NS", "SOUTHBANK.NS", "LLOYDSENGG.NS", "UJJIVANSFB.NS", "WELCORP.NS"
-]
\ No newline at end of file
+]
+
+# Renamed or demerged listings: old symbol -> current symbol
+SYMBOL_ALIASES = {
+    "TATAMOTORS.NS": "TMPV.NS",  # Tata Motors Passenger Vehicles, after the CV demerger
+    "ZOMATO.NS": "ETERNAL.NS",   # Zomato renamed to Eternal Ltd
+}